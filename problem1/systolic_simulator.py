@@ -0,0 +1,273 @@
+"""
+Single-node simulator of systolic_matrix_mul.c.
+
+Runs the same sqrt(P) x sqrt(P) block decomposition and 3*sqrt(P)-2 stage
+east/south shift schedule with one worker process per rank. Tiles live in
+multiprocessing.shared_memory segments, so a shift is a single copy from the
+neighbour's tile into our own (the MPI_Isend/MPI_Irecv pair) and nothing is
+pickled. As with MPI_Waitall, a rank only waits on the neighbours it talks to:
+its west/north producer must have published the tile, and its east/south
+consumer must have read the one we are about to overwrite. Each stage records
+the exchange time (those waits + the copy) and the compute time (NumPy dgemm
+on the tile).
+
+Results are appended in the strategy*.txt format:
+    N=.. P=.. time=.. cpu=.. rankKB=..
+rankKB is the growth of a worker's peak RSS after fork (tiles it touched),
+not the whole-process memKB of the C version, hence the different name.
+
+Usage:
+    python systolic_simulator.py stats_sim.txt --sizes 100 200 500 \
+        --ranks 1 4 9 16 --rep 10 --steps steps_sim.csv --check
+"""
+import os
+
+# One BLAS thread per worker, as with one MPI rank per core
+for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(var, "1")
+
+import argparse
+import math
+import multiprocessing as mp
+import resource
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+import numpy as np
+
+
+def adjust_size(base, threads):
+    # Same rounding as matrix_generator.c, so N matches the cluster runs
+    rem = base % threads
+    if rem == 0:
+        return base
+    down = base - rem
+    up = base + (threads - rem)
+    return (down if down > 0 else up) if base - down <= up - base else up
+
+
+def attach(name, shape):
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+
+def worker(rank, p, bs, names, sync, barrier):
+    # The fork inherits the parent's peak RSS, so only the growth is ours
+    rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    P = p * p
+    stages = 3 * p - 2
+    my_row, my_col = rank // p, rank % p
+
+    segs = []
+    def view(key, shape):
+        shm, arr = attach(names[key], shape)
+        segs.append(shm)
+        return arr
+
+    A_rowbuf = view("A_rowbuf", (p, p, bs, bs))
+    B_colbuf = view("B_colbuf", (p, p, bs, bs))
+    A_tile = view("A_tile", (2, P, bs, bs))   # double buffered by stage parity
+    B_tile = view("B_tile", (2, P, bs, bs))
+    C_tile = view("C_tile", (P, bs, bs))
+    steps = view("steps", (P, stages, 2))
+    stats = view("stats", (P, 3))
+
+    Cblk = C_tile[rank]
+    prod = np.empty((bs, bs))
+
+    barrier.wait()
+    t0 = time.perf_counter()
+
+    for s in range(stages):
+        cur, prev = s & 1, (s & 1) ^ 1
+        t_x = time.perf_counter()
+
+        # A_free/B_free start at 2: the consumer must have read the tile from
+        # stage s-2 before we overwrite that parity. A_ready/B_ready count
+        # tiles published to the east/south consumer.
+        if my_col < p - 1:
+            sync["A_free"][rank].acquire()
+        if my_col > 0:
+            if s > 0:
+                sync["A_ready"][rank - 1].acquire()
+                np.copyto(A_tile[cur, rank], A_tile[prev, rank - 1])
+                sync["A_free"][rank - 1].release()
+        else:
+            idx = s - my_row   # initial skew
+            if 0 <= idx < p:
+                np.copyto(A_tile[cur, rank], A_rowbuf[my_row, idx])
+        if my_col < p - 1:
+            sync["A_ready"][rank].release()
+
+        if my_row < p - 1:
+            sync["B_free"][rank].acquire()
+        if my_row > 0:
+            if s > 0:
+                sync["B_ready"][rank - p].acquire()
+                np.copyto(B_tile[cur, rank], B_tile[prev, rank - p])
+                sync["B_free"][rank - p].release()
+        else:
+            idx = s - my_col
+            if 0 <= idx < p:
+                np.copyto(B_tile[cur, rank], B_colbuf[my_col, idx])
+        if my_row < p - 1:
+            sync["B_ready"][rank].release()
+
+        t_c = time.perf_counter()
+
+        k = s - my_row - my_col
+        if 0 <= k < p:
+            np.matmul(A_tile[cur, rank], B_tile[cur, rank], out=prod)
+            Cblk += prod
+
+        t_e = time.perf_counter()
+        steps[rank, s, 0] = t_e - t_c
+        steps[rank, s, 1] = t_c - t_x
+
+    local_t = time.perf_counter() - t0
+
+    ru = resource.getrusage(resource.RUSAGE_SELF)
+    stats[rank] = (local_t, ru.ru_utime + ru.ru_stime, ru.ru_maxrss - rss0)
+
+    for shm in segs:
+        shm.close()
+
+
+def run_workers(procs):
+    # A dead rank leaves its neighbours blocked on a semaphore forever, so
+    # stop everybody as soon as one of them fails
+    try:
+        for proc in procs:
+            proc.start()
+        pending = list(procs)
+        while pending:
+            wait([proc.sentinel for proc in pending])
+            pending = [proc for proc in pending if proc.exitcode is None]
+            failed = [r for r, proc in enumerate(procs) if proc.exitcode]
+            if failed:
+                raise RuntimeError(f"ranks {failed} exited with an error")
+    finally:
+        for proc in procs:
+            if proc.is_alive():
+                proc.terminate()
+        for proc in procs:
+            if proc.pid is not None:
+                proc.join()
+
+
+def simulate(N, P, rng, check=False):
+    p = math.isqrt(P)
+    bs = N // p
+    stages = 3 * p - 2
+
+    shapes = {
+        "A_rowbuf": (p, p, bs, bs),
+        "B_colbuf": (p, p, bs, bs),
+        "A_tile": (2, P, bs, bs),
+        "B_tile": (2, P, bs, bs),
+        "C_tile": (P, bs, bs),
+        "steps": (P, stages, 2),
+        "stats": (P, 3),
+    }
+    segs, arrs = {}, {}
+    try:
+        for key, shape in shapes.items():
+            nbytes = max(1, int(np.prod(shape)) * 8)
+            segs[key] = shared_memory.SharedMemory(create=True, size=nbytes)
+            arrs[key] = np.ndarray(shape, dtype=np.float64, buffer=segs[key].buf)
+            arrs[key].fill(0.0)
+
+        A = rng.random((N, N))
+        B = rng.random((N, N))
+        # A_rowbuf[r][k] = A(r, k), B_colbuf[c][k] = B(k, c), as rank 0 scatters them
+        arrs["A_rowbuf"][:] = A.reshape(p, bs, p, bs).transpose(0, 2, 1, 3)
+        arrs["B_colbuf"][:] = B.reshape(p, bs, p, bs).transpose(2, 0, 1, 3)
+
+        names = {key: shm.name for key, shm in segs.items()}
+        sync = {
+            "A_ready": [mp.Semaphore(0) for _ in range(P)],
+            "B_ready": [mp.Semaphore(0) for _ in range(P)],
+            "A_free": [mp.Semaphore(2) for _ in range(P)],
+            "B_free": [mp.Semaphore(2) for _ in range(P)],
+        }
+        barrier = mp.Barrier(P)   # start line only, like MPI_Barrier before t0
+        procs = [mp.Process(target=worker, args=(r, p, bs, names, sync, barrier))
+                 for r in range(P)]
+        run_workers(procs)
+
+        if check:
+            C = arrs["C_tile"].reshape(p, p, bs, bs).transpose(0, 2, 1, 3).reshape(N, N)
+            if not np.allclose(C, A @ B):
+                raise RuntimeError(f"wrong result for N={N} P={P}")
+
+        stats = arrs["stats"].copy()
+        steps = arrs["steps"].copy()
+    finally:
+        for shm in segs.values():
+            shm.close()
+            shm.unlink()
+
+    return {
+        "time": stats[:, 0].max(),
+        "cpu": stats[0, 1],          # rank 0, like the C version
+        "rankKB": int(stats[:, 2].max()),
+        "steps": steps,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared-memory simulator of the systolic matrix multiply")
+    parser.add_argument("stats", nargs="?", help="append N=.. P=.. time=.. lines to this file")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 200, 500], help="base matrix sizes")
+    parser.add_argument("--ranks", type=int, nargs="+", default=[1, 4, 9, 16], help="perfect-square rank counts")
+    parser.add_argument("--rep", type=int, default=1, help="repetitions per (N, P)")
+    parser.add_argument("--steps", help="append per-rank, per-stage compute/exchange times to this CSV")
+    parser.add_argument("--check", action="store_true", help="verify C against A @ B")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    for P in args.ranks:
+        if P <= 0 or math.isqrt(P) ** 2 != P:
+            parser.error(f"P must be a perfect square, got {P}")
+    if any(base <= 0 for base in args.sizes) or args.rep <= 0:
+        parser.error("Sizes and repetitions must be positive.")
+
+    rng = np.random.default_rng(args.seed)
+
+    steps_fp = None
+    if args.steps:
+        new_file = not os.path.exists(args.steps) or os.path.getsize(args.steps) == 0
+        steps_fp = open(args.steps, "a")
+        if new_file:
+            steps_fp.write("N,P,run,rank,stage,compute,exchange\n")
+
+    try:
+        for base in args.sizes:
+            for P in args.ranks:
+                N = adjust_size(base, P)
+                for run in range(args.rep):
+                    res = simulate(N, P, rng, check=args.check)
+                    steps = res["steps"]
+                    comp = steps[:, :, 0].sum(axis=1).max()
+                    exch = steps[:, :, 1].sum(axis=1).max()
+
+                    if args.stats:
+                        with open(args.stats, "a") as fp:
+                            fp.write(f"N={N} P={P} time={res['time']:f} "
+                                     f"cpu={res['cpu']:f} rankKB={res['rankKB']}\n")
+                    if steps_fp:
+                        for rank in range(P):
+                            for s in range(steps.shape[1]):
+                                steps_fp.write(f"{N},{P},{run},{rank},{s},"
+                                               f"{steps[rank, s, 0]:.9f},{steps[rank, s, 1]:.9f}\n")
+
+                    print(f"Finished C=A×B  N={N}  P={P}  bs={N // math.isqrt(P)}  {res['time']:f}s "
+                          f"(compute {comp:f}s, exchange {exch:f}s, rank mem {res['rankKB'] / 1024.0:.1f} MB)")
+    finally:
+        if steps_fp:
+            steps_fp.close()
+
+
+if __name__ == "__main__":
+    main()